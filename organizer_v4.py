@@ -12,21 +12,62 @@ Usage:
     python organiser_v4.py --undo               # Reverse last run
     python organiser_v4.py --watch              # Auto-organize on new files
     python organiser_v4.py --no-ai              # Skip AI, use rules only
+    python organiser_v4.py --dedup              # Also detect duplicate files
     python organiser_v4.py --granularity high   # Deep nested AI sorting
 """
 
 import os
+import re
 import sys
+import errno
 import shutil
 import datetime
 import json
 import time
 import hashlib
+import io
+import itertools
+import mmap
+import sqlite3
+import threading
 import argparse
-import urllib.request
-import urllib.error
+import http.client
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    if sys.platform == 'linux':
+        try:
+            # Pin the inotify backend so watchdog never silently degrades to
+            # its own polling observer on Linux.
+            from watchdog.observers.inotify import InotifyObserver as Observer
+        except ImportError:
+            pass
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    WATCHDOG_AVAILABLE = False
+
 try:
     from rich.console import Console
     from rich.table import Table
@@ -59,8 +100,14 @@ APP_NAME = "Organizer"
 VERSION = "4.0.0"
 CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json')
 MANIFEST_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'manifest.json')
+MANIFEST_MOVES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'manifest.jsonl')
+HASH_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hash_cache.sqlite')
 DEFAULT_MODEL = "arcee-ai/trinity-large-preview:free"
+OPENROUTER_HOST = "openrouter.ai"
+OPENROUTER_PATH = "/api/v1/chat/completions"
 WATCH_INTERVAL = 5  # seconds
+AI_BATCH_SIZE = 25  # files per classification request
+JOURNAL_BATCH = 256  # journal records per write+fdatasync
 
 EXTENSIONS = {
     'Media': {
@@ -103,16 +150,18 @@ EXTENSIONS = {
 
 DESTINATIONS_FLAT = [f"{cat}/{sub}" for cat, subs in EXTENSIONS.items() for sub in subs]
 
-SYSTEM_FOLDERS_BASE = {'folders', 'misc'}
-for _cat in EXTENSIONS:
-    SYSTEM_FOLDERS_BASE.add(_cat.lower())
+# Flat extension → (category, subcategory) index so lookups are one dict hit
+# instead of a nested scan over EXTENSIONS.
+EXT_TO_CATSUB = {ext: (cat, sub)
+                 for cat, subs in EXTENSIONS.items()
+                 for sub, valid_exts in subs.items()
+                 for ext in valid_exts}
+
+SYSTEM_FOLDERS_BASE = frozenset({'folders', 'misc', *(cat.lower() for cat in EXTENSIONS)})
 
 def is_system_folder(name):
     """Check if a folder name is a system/managed folder."""
-    lower = name.lower()
-    if lower in SYSTEM_FOLDERS_BASE:
-        return True
-    return False
+    return name.lower() in SYSTEM_FOLDERS_BASE
 
 # ─── Banner ─────────────────────────────────────────────────────
 BANNER = """[bold cyan]
@@ -129,6 +178,20 @@ BANNER_PLAIN = """
 ╚═══════════════════════════════════════════════════════════════╝
 """
 
+# ─── JSON backend ───────────────────────────────────────────────
+# orjson (Rust/SIMD) when installed, stdlib json otherwise. Both helpers
+# deal in bytes so callers can open files in binary mode either way.
+
+def json_loads(data):
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_dumps_bytes(obj, indent=False):
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode('utf-8')
+
 # ═══════════════════════════════════════════════════════════════
 #  CONFIG MANAGEMENT
 # ═══════════════════════════════════════════════════════════════
@@ -137,14 +200,14 @@ def load_config():
     if not os.path.exists(CONFIG_FILE):
         return None
     try:
-        with open(CONFIG_FILE, 'r') as f:
-            return json.load(f)
+        with open(CONFIG_FILE, 'rb') as f:
+            return json_loads(f.read())
     except Exception:
         return None
 
 def save_config(config):
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(config, f, indent=4)
+    with open(CONFIG_FILE, 'wb') as f:
+        f.write(json_dumps_bytes(config, indent=True))
 
 def setup_config(skip_ai=False):
     if skip_ai:
@@ -179,20 +242,55 @@ def setup_config(skip_ai=False):
 #  UTILITY FUNCTIONS
 # ═══════════════════════════════════════════════════════════════
 
-def get_file_hash(filepath, chunk_size=8192):
-    """Calculate MD5 hash for duplicate detection."""
-    hasher = hashlib.md5()
+def get_file_hash(filepath, chunk_size=1 << 20):
+    """Calculate content hash for duplicate detection (BLAKE3 > xxh3 > MD5)."""
     try:
-        with open(filepath, 'rb') as f:
-            while True:
-                chunk = f.read(chunk_size)
-                if not chunk:
-                    break
-                hasher.update(chunk)
+        if BLAKE3_AVAILABLE:
+            # blake3 mmaps the file and hashes it across threads internally.
+            hasher = blake3.blake3(max_threads=blake3.blake3.AUTO)
+            hasher.update_mmap(filepath)
+            return hasher.hexdigest()
+        # xxh3_128 is SIMD-accelerated and plenty for equality fingerprints;
+        # MD5 is the always-available last resort.
+        hasher = xxhash.xxh3_128() if XXHASH_AVAILABLE else hashlib.md5()
+        size = os.path.getsize(filepath)
+        if size > chunk_size:
+            # mmap the whole file and hash it in place — no bounce buffer,
+            # and MADV_SEQUENTIAL tells the kernel to read ahead aggressively.
+            with open(filepath, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mm, 'madvise'):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                hasher.update(memoryview(mm))
+            return hasher.hexdigest()
+        # Small files: one read into a reusable buffer is cheaper than mmap.
+        buf = bytearray(chunk_size)
+        mv = memoryview(buf)
+        with open(filepath, 'rb', buffering=0) as f:
+            while (n := f.readinto(buf)):
+                hasher.update(mv[:n])
         return hasher.hexdigest()
     except (PermissionError, OSError):
         return None
 
+def get_file_head_tail_sig(filepath, size, n=65536):
+    """Cheap duplicate pre-check: hash of the first/last n bytes plus the size."""
+    try:
+        with open(filepath, 'rb') as f:
+            head = f.read(n)
+            tail = b''
+            if size > n:
+                f.seek(max(size - n, 0))
+                tail = f.read(n)
+        payload = head + size.to_bytes(8, 'little') + tail
+        if BLAKE3_AVAILABLE:
+            return blake3.blake3(payload).digest()
+        if XXHASH_AVAILABLE:
+            return xxhash.xxh3_128(payload).digest()
+        return hashlib.md5(payload).digest()
+    except (PermissionError, OSError):
+        return None
+
 def get_creation_date(filepath):
     try:
         stat = os.stat(filepath)
@@ -211,65 +309,138 @@ def format_size(size_bytes):
     return f"{size_bytes:.1f} PB"
 
 def generate_unique_name(dest_folder, filename):
+    """Atomically reserve a free filename in dest_folder (O_CREAT|O_EXCL placeholder)."""
     name, ext = os.path.splitext(filename)
-    dest = os.path.join(dest_folder, filename)
-    if not os.path.exists(dest):
+    flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY
+
+    def reserve(candidate):
+        fd = os.open(os.path.join(dest_folder, candidate), flags, 0o644)
+        os.close(fd)
+
+    try:
+        reserve(filename)
+        return filename
+    except FileExistsError:
+        pass
+    except OSError:
+        # Destination not writable/creatable here — let the move report it.
         return filename
-    # Check if it's a true duplicate by hash
-    counter = 1
+
+    # Collision: reserve a suffixed name. One syscall per attempt, race-free,
+    # and the pid keeps concurrent runs from fighting over the same suffix.
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    new_name = f"{name}_{timestamp}{ext}"
-    final = os.path.join(dest_folder, new_name)
-    while os.path.exists(final):
-        counter += 1
-        new_name = f"{name}_{timestamp}_{counter}{ext}"
-        final = os.path.join(dest_folder, new_name)
-    return new_name
+    base = f"{name}_{timestamp}_{os.getpid()}"
+    for i in itertools.count(1):
+        new_name = f"{base}_{i}{ext}" if i > 1 else f"{name}_{timestamp}{ext}"
+        try:
+            reserve(new_name)
+            return new_name
+        except FileExistsError:
+            continue
+        except OSError:
+            return new_name
+
+def discard_reservation(path):
+    """Remove a name reserved by generate_unique_name that was never filled.
+
+    Only a zero-byte placeholder is deleted — anything with content is a real
+    file (or a partial copy worth inspecting) and is left alone.
+    """
+    try:
+        if os.path.getsize(path) == 0:
+            os.unlink(path)
+    except OSError:
+        pass
+
+def fast_move(src, dst):
+    """Move an item: single rename syscall when possible, kernel-side copy otherwise."""
+    try:
+        # replace, not rename: destinations reserved by generate_unique_name
+        # are empty placeholder files we're meant to take over.
+        os.replace(src, dst)
+        return
+    except OSError as e:
+        error = e
+
+    # A reserved placeholder blocks a directory rename — clear it and retry.
+    if os.path.isdir(src) and os.path.isfile(dst):
+        try:
+            os.unlink(dst)
+            os.rename(src, dst)
+            return
+        except OSError as e:
+            error = e
+
+    # Anything other than a cross-device move is a real failure — surface it
+    # instead of retrying through slower copy paths that will fail the same way.
+    if error.errno != errno.EXDEV:
+        raise error
+
+    # Cross-device: copy in-kernel on Linux so the data never bounces through
+    # a userspace buffer — copy_file_range can even reflink on btrfs/xfs,
+    # with sendfile covering older kernels. Metadata is carried over before
+    # the source is dropped, matching what shutil.move would have preserved.
+    if sys.platform == 'linux' and (hasattr(os, 'copy_file_range') or hasattr(os, 'sendfile')):
+        in_kernel_copy = getattr(os, 'copy_file_range', None)
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    if in_kernel_copy is not None:
+                        copied = in_kernel_copy(fsrc.fileno(), fdst.fileno(), remaining)
+                    else:
+                        copied = os.sendfile(fdst.fileno(), fsrc.fileno(), None, remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            shutil.copystat(src, dst)
+            os.unlink(src)
+            return
+        except OSError:
+            try:
+                os.unlink(dst)
+            except OSError:
+                pass
+
+    shutil.move(src, dst)
+
+_DATE_PREFIX_RE = re.compile(r'^\d{4}-\d{2}-\d{2}')
+_date_prefix_cache = (None, '')  # ((year, yday), "YYYY-MM-DD")
 
 def auto_rename(filename):
     """Apply naming convention: YYYY-MM-DD_OriginalName."""
+    global _date_prefix_cache
     name, ext = os.path.splitext(filename)
-    date_prefix = datetime.datetime.now().strftime("%Y-%m-%d")
     # Don't double-prefix if already has a date pattern
-    if len(name) >= 10 and name[:4].isdigit() and name[4] == '-' and name[7] == '-':
+    if _DATE_PREFIX_RE.match(name):
         return filename
-    return f"{date_prefix}_{name}{ext}"
+    # strftime once per local calendar day instead of per file — the prefix
+    # is identical for every rename in a run, and keying on the local date
+    # keeps long-lived watch sessions rolling over at local midnight.
+    lt = time.localtime()
+    day = (lt.tm_year, lt.tm_yday)
+    if _date_prefix_cache[0] != day:
+        _date_prefix_cache = (day, time.strftime("%Y-%m-%d", lt))
+    return f"{_date_prefix_cache[1]}_{name}{ext}"
 
 def get_extension_category(ext):
     """Fallback: determine category from file extension."""
-    ext = ext.lower()
-    for cat, subs in EXTENSIONS.items():
-        for sub, valid_exts in subs.items():
-            if ext in valid_exts:
-                return cat, sub
-    return None, None
+    return EXT_TO_CATSUB.get(ext.lower(), (None, None))
 
 # ═══════════════════════════════════════════════════════════════
 #  AI CLASSIFICATION
 # ═══════════════════════════════════════════════════════════════
 
-def get_ai_classification(file_infos, config, granularity="normal"):
-    """
-    Sends batch of file info to OpenRouter for smart classification.
-    file_infos: list of dicts with {name, size, date}
-    """
-    if not config or not file_infos:
-        return {}
-
-    if granularity == "high":
-        gran_text = """**HIGH GRANULARITY MODE**: Create DEEPLY nested, extremely specific folders.
-    Example: "Roblox/CityProject/Models", "School/Physics/Lab_Reports", "Work/Clients/Acme/Contracts"."""
-    else:
-        gran_text = """Create descriptive, project-aware folder names.
+# The prompt is mostly static — assemble everything but the file list once at
+# import so each batch call only joins its own file descriptions.
+_GRAN_TEXT_NORMAL = """Create descriptive, project-aware folder names.
     Example: "Roblox/CityProject", "SchoolWork/Math", "Photography/Wedding"."""
 
-    # Build rich file info for AI
-    files_desc = []
-    for fi in file_infos:
-        files_desc.append(f"  - {fi['name']} ({fi['size']}, modified {fi['date']})")
-    files_text = "\n".join(files_desc)
+_GRAN_TEXT_HIGH = """**HIGH GRANULARITY MODE**: Create DEEPLY nested, extremely specific folders.
+    Example: "Roblox/CityProject/Models", "School/Physics/Lab_Reports", "Work/Clients/Acme/Contracts"."""
 
-    prompt = f"""You are an expert file organization AI that specializes in PROJECT DETECTION.
+def _build_prompt_prefix(gran_text):
+    return f"""You are an expert file organization AI that specializes in PROJECT DETECTION.
 
 Your #1 priority is to detect PROJECTS and THEMES from filenames:
 - Look for common prefixes, keywords, and naming patterns.
@@ -287,10 +458,49 @@ Rules:
 5. Use "Misc" only if a file is completely unrelated to anything else.
 
 Files to classify:
-{files_text}
+"""
+
+_PROMPT_PREFIX_NORMAL = _build_prompt_prefix(_GRAN_TEXT_NORMAL)
+_PROMPT_PREFIX_HIGH = _build_prompt_prefix(_GRAN_TEXT_HIGH)
+
+_PROMPT_SUFFIX = """
 
 Return ONLY a valid JSON object mapping each filename to its destination folder.
-Example: {{"BloxCityBuildings.obj": "Roblox/CityProject", "resume_v2.docx": "Career/Applications"}}"""
+Example: {"BloxCityBuildings.obj": "Roblox/CityProject", "resume_v2.docx": "Career/Applications"}"""
+
+# Serially-numbered files (IMG_1234.jpg ... IMG_9999.jpg) classify the same
+# way, so remember AI answers per normalized "shape" (digit runs collapsed).
+# In-memory only: a project mapping shouldn't outlive the session.
+_AI_SHAPE_RE = re.compile(r'\d+')
+_ai_shape_cache = {}
+
+def _filename_shape(name):
+    return _AI_SHAPE_RE.sub('#', name.lower())
+
+_HEADERS_CACHE = {}
+
+def _auth_headers(api_key):
+    headers = _HEADERS_CACHE.get(api_key)
+    if headers is None:
+        headers = _HEADERS_CACHE[api_key] = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://github.com/shubh72010/organizer",
+        }
+    return headers
+
+def get_ai_classification(file_infos, config, granularity="normal", conn=None):
+    """
+    Sends batch of file info to OpenRouter for smart classification.
+    file_infos: list of dicts with {name, size, date}
+    conn: optional http.client.HTTPSConnection to reuse (keep-alive)
+    """
+    if not config or not file_infos:
+        return {}
+
+    prefix = _PROMPT_PREFIX_HIGH if granularity == "high" else _PROMPT_PREFIX_NORMAL
+    files_text = "\n".join(f"  - {fi['name']} ({fi['size']}, modified {fi['date']})" for fi in file_infos)
+    prompt = prefix + files_text + _PROMPT_SUFFIX
 
     data = {
         "model": config['model'],
@@ -298,57 +508,83 @@ Example: {{"BloxCityBuildings.obj": "Roblox/CityProject", "resume_v2.docx": "Car
         "response_format": {"type": "json_object"}
     }
 
-    headers = {
-        "Authorization": f"Bearer {config['api_key']}",
-        "Content-Type": "application/json",
-        "HTTP-Referer": "https://github.com/shubh72010/organizer",
-    }
+    headers = _auth_headers(config['api_key'])
 
+    own_conn = conn is None
     try:
-        req = urllib.request.Request(
-            "https://openrouter.ai/api/v1/chat/completions",
-            data=json.dumps(data).encode('utf-8'),
-            headers=headers
-        )
-        with urllib.request.urlopen(req, timeout=30) as response:
-            result = json.load(response)
-            content = result['choices'][0]['message']['content']
-            # Try to extract JSON even if wrapped in markdown
-            if "```" in content:
-                content = content.split("```")[1]
-                if content.startswith("json"):
-                    content = content[4:]
-            return json.loads(content.strip())
+        if own_conn:
+            conn = http.client.HTTPSConnection(OPENROUTER_HOST, timeout=30)
+        conn.request("POST", OPENROUTER_PATH, body=json_dumps_bytes(data), headers=headers)
+        response = conn.getresponse()
+        result = json_loads(response.read())
+        content = result['choices'][0]['message']['content']
+        # Try to extract JSON even if wrapped in markdown
+        if "```" in content:
+            content = content.split("```")[1]
+            if content.startswith("json"):
+                content = content[4:]
+        return json_loads(content.strip())
     except Exception as e:
         cprint(f"⚠️  AI Error: {e}", "bold red")
+        # A failed exchange leaves a shared keep-alive connection mid-request
+        # and every later batch on it would raise CannotSendRequest. Closing
+        # it lets http.client reconnect transparently on the next request, so
+        # one failed batch only costs that batch.
+        if not own_conn:
+            conn.close()
         return {}
+    finally:
+        if own_conn and conn is not None:
+            conn.close()
 
 # ═══════════════════════════════════════════════════════════════
 #  MANIFEST / UNDO SYSTEM
 # ═══════════════════════════════════════════════════════════════
 
-def save_manifest(moves):
-    """Save a record of all moves for undo."""
+def save_manifest(move_count):
+    """Save run metadata for undo; the moves themselves are streamed to manifest.jsonl."""
     manifest = {
         "timestamp": datetime.datetime.now().isoformat(),
         "version": VERSION,
-        "moves": moves
+        "moves": move_count
     }
-    with open(MANIFEST_FILE, 'w') as f:
-        json.dump(manifest, f, indent=2)
-    cprint(f"📋 Manifest saved ({len(moves)} moves) → [bold]{MANIFEST_FILE}[/bold]", "dim")
+    with open(MANIFEST_FILE, 'wb') as f:
+        f.write(json_dumps_bytes(manifest, indent=True))
+    cprint(f"📋 Manifest saved ({move_count} moves) → [bold]{MANIFEST_MOVES_FILE}[/bold]", "dim")
+
+def load_manifest_moves():
+    """Read the move records of the last run (JSON-Lines, one move per line)."""
+    moves = []
+    if os.path.exists(MANIFEST_MOVES_FILE):
+        with open(MANIFEST_MOVES_FILE, 'rb') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    moves.append(json_loads(line))
+        return moves
+    # Pre-4.x manifests kept the moves inline in manifest.json
+    if os.path.exists(MANIFEST_FILE):
+        with open(MANIFEST_FILE, 'rb') as f:
+            inline = json_loads(f.read()).get("moves")
+        if isinstance(inline, list):
+            return inline
+    return moves
 
 def undo_last_run():
     """Reverse all moves from the last manifest."""
-    if not os.path.exists(MANIFEST_FILE):
+    if not os.path.exists(MANIFEST_MOVES_FILE) and not os.path.exists(MANIFEST_FILE):
         cprint("❌ No manifest found. Nothing to undo.", "bold red")
         return
 
-    with open(MANIFEST_FILE, 'r') as f:
-        manifest = json.load(f)
+    moves = load_manifest_moves()
 
-    moves = manifest.get("moves", [])
-    ts = manifest.get("timestamp", "unknown")
+    ts = "unknown"
+    if os.path.exists(MANIFEST_FILE):
+        try:
+            with open(MANIFEST_FILE, 'rb') as f:
+                ts = json_loads(f.read()).get("timestamp", "unknown")
+        except Exception:
+            pass
 
     if not moves:
         cprint("❌ Manifest is empty.", "bold red")
@@ -376,7 +612,7 @@ def undo_last_run():
                 try:
                     if os.path.exists(src):
                         os.makedirs(dst_dir, exist_ok=True)
-                        shutil.move(src, dst)
+                        fast_move(src, dst)
                         success += 1
                     else:
                         errors += 1
@@ -391,7 +627,7 @@ def undo_last_run():
             try:
                 if os.path.exists(src):
                     os.makedirs(dst_dir, exist_ok=True)
-                    shutil.move(src, dst)
+                    fast_move(src, dst)
                     success += 1
                 else:
                     errors += 1
@@ -401,10 +637,11 @@ def undo_last_run():
     cprint(f"\n✅ Undo complete: {success} restored, {errors} errors.", "bold green" if errors == 0 else "yellow")
 
     # Remove the manifest after undo
-    try:
-        os.remove(MANIFEST_FILE)
-    except Exception:
-        pass
+    for path in (MANIFEST_FILE, MANIFEST_MOVES_FILE):
+        try:
+            os.remove(path)
+        except Exception:
+            pass
 
 # ═══════════════════════════════════════════════════════════════
 #  SCANNING & CLASSIFICATION
@@ -416,35 +653,53 @@ def scan_directory(source_dir):
     folders = []
     script_name = os.path.basename(__file__)
 
-    for item_name in os.listdir(source_dir):
-        item_path = os.path.join(source_dir, item_name)
-        if item_name == script_name:
-            continue
-
-        if os.path.isdir(item_path):
-            if not is_system_folder(item_name):
-                folders.append({
+    # scandir caches the stat result on the DirEntry, so each entry costs at
+    # most one stat syscall instead of the 3-4 a listdir + isdir/getsize/stat
+    # combination issues.
+    fromtimestamp = datetime.datetime.fromtimestamp
+    splitext = os.path.splitext
+    with os.scandir(source_dir) as it:
+        for entry in it:
+            item_name = entry.name
+            if item_name == script_name:
+                continue
+
+            if entry.is_dir(follow_symlinks=False):
+                if item_name.lower() not in SYSTEM_FOLDERS_BASE:
+                    try:
+                        date = fromtimestamp(entry.stat().st_mtime)
+                    except (OSError, ValueError):
+                        date = datetime.datetime.now()
+                    folders.append({
+                        "name": item_name,
+                        "path": entry.path,
+                        "month_year": date.strftime("%Y-%m")
+                    })
+            else:
+                try:
+                    # Non-dirs include symlinks; stat the entry itself so a
+                    # link never costs an extra path resolution (or an error
+                    # round-trip when dangling).
+                    st = entry.stat(follow_symlinks=False)
+                    size = st.st_size
+                    mtime_ns = st.st_mtime_ns
+                    date = fromtimestamp(st.st_mtime)
+                except (OSError, ValueError):
+                    size = 0
+                    mtime_ns = 0
+                    date = datetime.datetime.now()
+
+                _, ext = splitext(item_name)
+                files.append({
                     "name": item_name,
-                    "path": item_path,
-                    "date": get_creation_date(item_path)
+                    "path": entry.path,
+                    "ext": ext.lower(),
+                    "size": size,
+                    "mtime_ns": mtime_ns,
+                    "size_human": format_size(size),
+                    "date_str": date.strftime("%Y-%m-%d"),
+                    "month_year": date.strftime("%Y-%m")
                 })
-        else:
-            try:
-                size = os.path.getsize(item_path)
-            except OSError:
-                size = 0
-
-            _, ext = os.path.splitext(item_name)
-            files.append({
-                "name": item_name,
-                "path": item_path,
-                "ext": ext.lower(),
-                "size": size,
-                "size_human": format_size(size),
-                "date": get_creation_date(item_path),
-                "date_str": get_creation_date(item_path).strftime("%Y-%m-%d"),
-                "hash": None  # Computed lazily
-            })
 
     return files, folders
 
@@ -455,29 +710,58 @@ def classify_files(files, config, granularity, source_dir):
     # AI Classification
     if config and files:
         cprint(f"\n🤖 Asking AI to classify {len(files)} files (granularity: {granularity})...", "bold cyan")
-        file_infos = [{"name": f["name"], "size": f["size_human"], "date": f["date_str"]} for f in files]
 
-        # Batch in chunks of 25
-        for i in range(0, len(file_infos), 25):
-            chunk = file_infos[i:i + 25]
-            result = get_ai_classification(chunk, config, granularity)
-            ai_mapping.update(result)
-            if i + 25 < len(file_infos):
-                time.sleep(0.5)
+        # Shape-cache hits (e.g. the next IMG_####.jpg in a watch session)
+        # skip the network entirely.
+        file_infos = []
+        for f in files:
+            cached = _ai_shape_cache.get((_filename_shape(f["name"]), granularity))
+            if cached is not None:
+                ai_mapping[f["name"]] = cached
+            else:
+                file_infos.append({"name": f["name"], "size": f["size_human"], "date": f["date_str"]})
+
+        # Batches are independent, so fire them concurrently (capped at 4 so
+        # we stay well under provider rate limits). Each worker thread keeps
+        # its own TLS connection alive across the batches it handles.
+        batches = [file_infos[i:i + AI_BATCH_SIZE] for i in range(0, len(file_infos), AI_BATCH_SIZE)]
+        tls = threading.local()
+        conns = []
+
+        def fetch(chunk):
+            conn = getattr(tls, "conn", None)
+            if conn is None:
+                conn = tls.conn = http.client.HTTPSConnection(OPENROUTER_HOST, timeout=30)
+                conns.append(conn)
+            return get_ai_classification(chunk, config, granularity, conn=conn)
+
+        if batches:
+            try:
+                with ThreadPoolExecutor(max_workers=min(4, len(batches))) as ex:
+                    for result in ex.map(fetch, batches):
+                        ai_mapping.update(result)
+            finally:
+                for conn in conns:
+                    conn.close()
+
+        for name, dest in ai_mapping.items():
+            _ai_shape_cache[(_filename_shape(name), granularity)] = dest
 
         cprint(f"✅ AI classified {len(ai_mapping)} files.", "green")
 
     # Determine destinations
     results = []
     for f in files:
-        month_year = f["date"].strftime("%Y-%m")
+        month_year = f["month_year"]
 
         ai_cat = ai_mapping.get(f["name"])
         if ai_cat and ai_cat != "Misc":
             dest_folder = os.path.join(source_dir, ai_cat, month_year)
             method = "🤖 AI"
         else:
-            cat, sub = get_extension_category(f["ext"])
+            # exts are stored lowercased by scan_directory, so hit the flat
+            # table directly instead of going through get_extension_category
+            cat, sub = EXT_TO_CATSUB.get(f["ext"], (None, None))
             if cat:
                 dest_folder = os.path.join(source_dir, cat, sub, month_year)
                 method = "📁 Rules"
@@ -493,32 +777,108 @@ def classify_files(files, config, granularity, source_dir):
 #  DUPLICATE DETECTION
 # ═══════════════════════════════════════════════════════════════
 
+# Oversubscribe the hashing pool relative to cores: blake3/xxhash/md5 release
+# the GIL, and extra workers keep the disk queue full while others compute.
+HASH_WORKERS = min(32, 4 * (os.cpu_count() or 1))
+
+_hash_cache_conn = None
+
+def open_hash_cache():
+    """Open (or reuse) the persistent content-hash cache, or None if unavailable."""
+    global _hash_cache_conn
+    if _hash_cache_conn is not None:
+        return _hash_cache_conn
+    try:
+        conn = sqlite3.connect(HASH_CACHE_FILE)
+        conn.execute("CREATE TABLE IF NOT EXISTS hashes(path TEXT PRIMARY KEY, size INT, mtime INT, hash TEXT)")
+        _hash_cache_conn = conn
+        return conn
+    except sqlite3.Error:
+        return None
+
 def detect_duplicates(files):
-    """Find true duplicates using MD5 hash."""
+    """Find true duplicates using content hashes."""
     hash_map = {}
     duplicates = []
+    cache = open_hash_cache()
+    cache_updates = []
+
+    # Files with a unique size cannot have a duplicate — only hash within
+    # size groups of 2+ (the classic fdupes/rdfind pre-filter).
+    by_size = defaultdict(list)
+    for f in files:
+        f["hash"] = None
+        by_size[f["size"]].append(f)
+
+    # Second tier: within same-size groups, compare a cheap head+tail sample
+    # signature (rdfind-style) so big files that differ early are never read
+    # end-to-end.
+    sig_files = [f for group in by_size.values() if len(group) > 1 for f in group]
+    by_sig = defaultdict(list)
+    if sig_files:
+        # Two small reads per file, so this is I/O-bound — overlap them the
+        # same way the full hashing pass does.
+        with ThreadPoolExecutor(max_workers=HASH_WORKERS) as ex:
+            sigs = ex.map(lambda f: get_file_head_tail_sig(f["path"], f["size"]), sig_files)
+            for f, sig in zip(sig_files, sigs):
+                if sig is not None:
+                    by_sig[(f["size"], sig)].append(f)
+    candidates = [f for group in by_sig.values() if len(group) > 1 for f in group]
+
+    def record(f, file_hash, advance):
+        f["hash"] = file_hash
+        if file_hash:
+            if file_hash in hash_map:
+                duplicates.append((f, hash_map[file_hash]))
+            else:
+                hash_map[file_hash] = f
+        if advance:
+            advance()
+
+    def hash_all(advance=None):
+        # Consult the persistent cache first: unchanged (path, size, mtime)
+        # tuples reuse the stored hash with zero bytes read.
+        to_hash = []
+        for f in candidates:
+            cached = None
+            if cache is not None:
+                row = cache.execute(
+                    "SELECT hash FROM hashes WHERE path=? AND size=? AND mtime=?",
+                    (f["path"], f["size"], f.get("mtime_ns"))
+                ).fetchone()
+                if row:
+                    cached = row[0]
+            if cached:
+                record(f, cached, advance)
+            else:
+                to_hash.append(f)
+
+        # Hashing releases the GIL, so a thread pool overlaps I/O and CPU
+        # across files; hash_map stays on the main thread (no locking needed).
+        with ThreadPoolExecutor(max_workers=HASH_WORKERS) as ex:
+            futures = {ex.submit(get_file_hash, f["path"]): f for f in to_hash}
+            for future in as_completed(futures):
+                f = futures[future]
+                file_hash = future.result()
+                if file_hash:
+                    cache_updates.append((f["path"], f["size"], f.get("mtime_ns"), file_hash))
+                record(f, file_hash, advance)
 
     if console:
         with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), BarColumn(), console=console, transient=True) as progress:
-            task = progress.add_task("🔍 Hashing files for duplicate detection...", total=len(files))
-            for f in files:
-                file_hash = get_file_hash(f["path"])
-                f["hash"] = file_hash
-                if file_hash:
-                    if file_hash in hash_map:
-                        duplicates.append((f, hash_map[file_hash]))
-                    else:
-                        hash_map[file_hash] = f
-                progress.advance(task)
+            task = progress.add_task("🔍 Hashing files for duplicate detection...", total=len(candidates))
+            hash_all(lambda: progress.advance(task))
     else:
-        for f in files:
-            file_hash = get_file_hash(f["path"])
-            f["hash"] = file_hash
-            if file_hash:
-                if file_hash in hash_map:
-                    duplicates.append((f, hash_map[file_hash]))
-                else:
-                    hash_map[file_hash] = f
+        hash_all()
+
+    # One transaction per pass; the connection stays open so --watch cycles
+    # don't pay for reopening the database on every event batch.
+    if cache is not None and cache_updates:
+        try:
+            cache.executemany("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?)", cache_updates)
+            cache.commit()
+        except sqlite3.Error:
+            pass
 
     return duplicates
 
@@ -528,9 +888,34 @@ def detect_duplicates(files):
 
 def execute_moves(classified_files, folders, source_dir, dry_run=False, rename=True):
     """Move files and folders (or preview in dry-run mode)."""
-    manifest_moves = []
+    manifest_fd = None
+    journal_buf = io.BytesIO()
+    journal_pending = 0
     stats = {"moved": 0, "skipped": 0, "errors": 0, "by_category": {}, "total_size": 0}
 
+    def log_move(src, dst):
+        # Buffer journal records and flush them in batches: one write() +
+        # fdatasync() per JOURNAL_BATCH moves instead of a disk sync per file,
+        # while still bounding how many records a crash could lose.
+        nonlocal manifest_fd, journal_pending
+        if manifest_fd is None:
+            manifest_fd = os.open(
+                MANIFEST_MOVES_FILE,
+                os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_APPEND, 0o600)
+        journal_buf.write(json_dumps_bytes({"from": src, "to": dst}) + b"\n")
+        journal_pending += 1
+        if journal_pending >= JOURNAL_BATCH:
+            flush_journal()
+
+    def flush_journal():
+        nonlocal journal_pending
+        if journal_pending:
+            os.write(manifest_fd, journal_buf.getvalue())
+            os.fdatasync(manifest_fd)
+            journal_buf.seek(0)
+            journal_buf.truncate()
+            journal_pending = 0
+
     # ── Display preview table ──
     if console:
         table = Table(title="📦 Organization Plan", box=box.ROUNDED, border_style="cyan", show_lines=False)
@@ -550,7 +935,7 @@ def execute_moves(classified_files, folders, source_dir, dry_run=False, rename=T
         if folders:
             table.add_row("", "─── Folders ───", "", "", "", style="dim")
             for fl in folders:
-                dest = f"Folders/{fl['date'].strftime('%Y-%m')}"
+                dest = f"Folders/{fl['month_year']}"
                 table.add_row("📂", fl["name"], "", "🗂️ Folder", dest)
 
         console.print(table)
@@ -569,6 +954,16 @@ def execute_moves(classified_files, folders, source_dir, dry_run=False, rename=T
         cprint("✨ Nothing to organize — folder is already clean!", "bold green")
         return stats
 
+    # Create each destination directory once up front instead of issuing a
+    # makedirs syscall per moved item.
+    needed_dirs = {f["dest_folder"] for f in classified_files if f["dest_folder"]}
+    needed_dirs.update(os.path.join(source_dir, 'Folders', fl["month_year"]) for fl in folders)
+    for d in needed_dirs:
+        try:
+            os.makedirs(d, exist_ok=True)
+        except OSError as e:
+            cprint(f"  ❌ Error creating {d}: {e}", "red")
+
     if console:
         with Progress(
             SpinnerColumn(style="cyan"),
@@ -580,7 +975,19 @@ def execute_moves(classified_files, folders, source_dir, dry_run=False, rename=T
         ) as progress:
             task = progress.add_task("🚀 Organizing files...", total=len(all_items))
 
+            # Local bindings dodge repeated global/attribute lookups in a loop
+            # that can run tens of thousands of times.
+            _join = os.path.join
+            _abspath = os.path.abspath
+            _move = fast_move
+            _unique = generate_unique_name
+            folders_base = _join(source_dir, 'Folders')
+
             for item, is_file in all_items:
+                # Name reserved by _unique but not yet filled by a move —
+                # cleaned up on failure so the empty placeholder doesn't
+                # squat on the canonical filename.
+                reserved = None
                 try:
                     if is_file:
                         dest_folder = item["dest_folder"]
@@ -591,12 +998,13 @@ def execute_moves(classified_files, folders, source_dir, dry_run=False, rename=T
                         if rename:
                             filename = auto_rename(filename)
 
-                        os.makedirs(dest_folder, exist_ok=True)
-                        final_name = generate_unique_name(dest_folder, filename)
-                        final_path = os.path.join(dest_folder, final_name)
+                        final_name = _unique(dest_folder, filename)
+                        final_path = _join(dest_folder, final_name)
 
-                        shutil.move(original_path, final_path)
-                        manifest_moves.append({"from": original_path, "to": final_path})
+                        reserved = final_path
+                        _move(original_path, final_path)
+                        reserved = None
+                        log_move(original_path, final_path)
 
                         # Stats
                         stats["moved"] += 1
@@ -606,60 +1014,85 @@ def execute_moves(classified_files, folders, source_dir, dry_run=False, rename=T
                     else:
                         # Folder
                         fl = item
-                        dest = os.path.join(source_dir, 'Folders', fl["date"].strftime("%Y-%m"))
+                        dest = _join(folders_base, fl["month_year"])
 
-                        abs_dest = os.path.abspath(dest)
-                        abs_src = os.path.abspath(fl["path"])
+                        abs_dest = _abspath(dest)
+                        abs_src = _abspath(fl["path"])
                         if abs_dest.startswith(abs_src) or abs_dest == abs_src:
                             stats["skipped"] += 1
                             progress.advance(task)
                             continue
 
-                        os.makedirs(dest, exist_ok=True)
-                        final_name = generate_unique_name(dest, fl["name"])
-                        final_path = os.path.join(dest, final_name)
-                        shutil.move(fl["path"], final_path)
-                        manifest_moves.append({"from": fl["path"], "to": final_path})
+                        final_name = _unique(dest, fl["name"])
+                        final_path = _join(dest, final_name)
+                        reserved = final_path
+                        _move(fl["path"], final_path)
+                        reserved = None
+                        log_move(fl["path"], final_path)
                         stats["moved"] += 1
 
                 except Exception as e:
+                    if reserved:
+                        discard_reservation(reserved)
                     stats["errors"] += 1
                     cprint(f"  ❌ Error: {item.get('name', '?')}: {e}", "red")
 
                 progress.advance(task)
     else:
+        _join = os.path.join
+        _abspath = os.path.abspath
+        _move = fast_move
+        _unique = generate_unique_name
+        folders_base = _join(source_dir, 'Folders')
+        # Collect the per-file log lines and emit them in one write at the
+        # end — a print() per moved file dominates plain-mode runtime when
+        # stdout is a pipe or log file.
+        moved_lines = []
+
         for item, is_file in all_items:
+            reserved = None
             try:
                 if is_file:
                     dest_folder = item["dest_folder"]
                     original_path = item["path"]
                     filename = auto_rename(item["name"]) if rename else item["name"]
-                    os.makedirs(dest_folder, exist_ok=True)
-                    final_name = generate_unique_name(dest_folder, filename)
-                    final_path = os.path.join(dest_folder, final_name)
-                    shutil.move(original_path, final_path)
-                    manifest_moves.append({"from": original_path, "to": final_path})
+                    final_name = _unique(dest_folder, filename)
+                    final_path = _join(dest_folder, final_name)
+                    reserved = final_path
+                    _move(original_path, final_path)
+                    reserved = None
+                    log_move(original_path, final_path)
                     stats["moved"] += 1
                     stats["total_size"] += item.get("size", 0)
-                    print(f"  Moved: {item['name']} -> {dest_folder}")
+                    moved_lines.append(f"  Moved: {item['name']} -> {dest_folder}\n")
                 else:
                     fl = item
-                    dest = os.path.join(source_dir, 'Folders', fl["date"].strftime("%Y-%m"))
-                    abs_dest = os.path.abspath(dest)
-                    abs_src = os.path.abspath(fl["path"])
+                    dest = _join(folders_base, fl["month_year"])
+                    abs_dest = _abspath(dest)
+                    abs_src = _abspath(fl["path"])
                     if abs_dest.startswith(abs_src) or abs_dest == abs_src:
                         continue
-                    os.makedirs(dest, exist_ok=True)
-                    final_name = generate_unique_name(dest, fl["name"])
-                    shutil.move(fl["path"], os.path.join(dest, final_name))
-                    manifest_moves.append({"from": fl["path"], "to": os.path.join(dest, final_name)})
+                    final_name = _unique(dest, fl["name"])
+                    final_path = _join(dest, final_name)
+                    reserved = final_path
+                    _move(fl["path"], final_path)
+                    reserved = None
+                    log_move(fl["path"], final_path)
                     stats["moved"] += 1
             except Exception as e:
+                if reserved:
+                    discard_reservation(reserved)
                 stats["errors"] += 1
 
-    # Save manifest
-    if manifest_moves:
-        save_manifest(manifest_moves)
+        if moved_lines:
+            sys.stdout.write(''.join(moved_lines))
+            sys.stdout.flush()
+
+    # Finalize manifest
+    if manifest_fd is not None:
+        flush_journal()
+        os.close(manifest_fd)
+        save_manifest(stats["moved"])
 
     return stats
 
@@ -721,11 +1154,83 @@ def show_stats(stats, duplicates, total_files, total_folders):
 #  WATCH MODE
 # ═══════════════════════════════════════════════════════════════
 
+def organize_new_items(new_items, source_dir, config, granularity):
+    """Classify and move just the named items that appeared in source_dir.
+
+    Returns the top-level folder names the moves created or filled, so the
+    event-driven watcher can ignore them instead of treating freshly made
+    category folders as new user items.
+    """
+    cprint(f"\n📥 {len(new_items)} new item(s) detected!", "bold green")
+    files, folders = scan_directory(source_dir)
+    new_files = [f for f in files if f["name"] in new_items]
+    new_folders = [f for f in folders if f["name"] in new_items]
+
+    created = set()
+    if new_files or new_folders:
+        classified = classify_files(new_files, config, granularity, source_dir)
+        execute_moves(classified, new_folders, source_dir, dry_run=False, rename=True)
+        for f in classified:
+            if f["dest_folder"]:
+                rel = os.path.relpath(f["dest_folder"], source_dir)
+                created.add(rel.split(os.sep, 1)[0])
+        if new_folders:
+            created.add('Folders')
+    return created
+
 def watch_folder(source_dir, config, granularity):
     """Continuously watch and auto-organize new files."""
     cprint(f"\n👀 [bold]Watch Mode[/bold] — Monitoring: {source_dir}", "bold cyan")
-    cprint(f"   Checking every {WATCH_INTERVAL}s. Press Ctrl+C to stop.\n", "dim")
 
+    if WATCHDOG_AVAILABLE:
+        cprint("   Using filesystem notifications. Press Ctrl+C to stop.\n", "dim")
+        _watch_folder_events(source_dir, config, granularity)
+    else:
+        cprint(f"   Checking every {WATCH_INTERVAL}s. Press Ctrl+C to stop.\n", "dim")
+        _watch_folder_polling(source_dir, config, granularity)
+
+def _watch_folder_events(source_dir, config, granularity):
+    """Event-driven watch loop: kernel notifications via watchdog, no polling scans."""
+    pending = set()
+    lock = threading.Lock()
+
+    class NewItemHandler(FileSystemEventHandler):
+        def on_created(self, event):
+            with lock:
+                pending.add(os.path.basename(event.src_path))
+
+        def on_moved(self, event):
+            with lock:
+                pending.add(os.path.basename(event.dest_path))
+
+    observer = Observer()
+    observer.schedule(NewItemHandler(), source_dir, recursive=False)
+    observer.start()
+    last_created = set()
+    try:
+        while True:
+            # Debounce: let a burst of events (e.g. a finishing download)
+            # settle before organizing the batch.
+            time.sleep(0.5)
+            with lock:
+                # Organizing raises on_created events for the category
+                # folders it makes at the top level — drop those so they
+                # aren't relocated as if a user had added them.
+                new_items = pending - last_created
+                pending.clear()
+            if new_items:
+                last_created = organize_new_items(new_items, source_dir, config, granularity)
+                if last_created:
+                    with lock:
+                        pending -= last_created
+    except KeyboardInterrupt:
+        cprint("\n\n🛑 Watch mode stopped.", "bold yellow")
+    finally:
+        observer.stop()
+        observer.join()
+
+def _watch_folder_polling(source_dir, config, granularity):
+    """Fallback watch loop when watchdog isn't installed: listdir + diff."""
     known_items = set(os.listdir(source_dir))
 
     try:
@@ -735,17 +1240,7 @@ def watch_folder(source_dir, config, granularity):
             new_items = current_items - known_items
 
             if new_items:
-                cprint(f"\n📥 {len(new_items)} new item(s) detected!", "bold green")
-                # Run organizer on the folder
-                files, folders = scan_directory(source_dir)
-                # Only process new items
-                new_files = [f for f in files if f["name"] in new_items]
-                new_folders = [f for f in folders if f["name"] in new_items]
-
-                if new_files or new_folders:
-                    classified = classify_files(new_files, config, granularity, source_dir)
-                    execute_moves(classified, new_folders, source_dir, dry_run=False, rename=True)
-
+                organize_new_items(new_items, source_dir, config, granularity)
                 known_items = set(os.listdir(source_dir))
             else:
                 if console:
@@ -757,7 +1252,7 @@ def watch_folder(source_dir, config, granularity):
 #  MAIN ORCHESTRATOR
 # ═══════════════════════════════════════════════════════════════
 
-def organize(source_dir, config, granularity="normal", dry_run=False, rename=True):
+def organize(source_dir, config, granularity="normal", dry_run=False, rename=True, dedup=False):
     """Main orchestration function."""
     cprint(f"\n📂 Target: [bold]{source_dir}[/bold]", "white")
     cprint(f"   Mode: {'🏜️ Dry Run' if dry_run else '🚀 Live'} | Granularity: {granularity} | Rename: {'✅' if rename else '❌'}\n", "dim")
@@ -770,8 +1265,8 @@ def organize(source_dir, config, granularity="normal", dry_run=False, rename=Tru
         cprint("✨ Nothing to organize!", "bold green")
         return
 
-    # 2. Detect duplicates
-    duplicates = detect_duplicates(files)
+    # 2. Detect duplicates (opt-in — hashing is the heaviest phase)
+    duplicates = detect_duplicates(files) if dedup and len(files) >= 2 else []
     if duplicates:
         cprint(f"   ⚠️  Found [bold]{len(duplicates)}[/bold] duplicate file(s).", "yellow")
 
@@ -790,7 +1285,20 @@ def organize(source_dir, config, granularity="normal", dry_run=False, rename=Tru
 #  ENTRY POINT
 # ═══════════════════════════════════════════════════════════════
 
-def main():
+# Documented boolean flags → Namespace attribute names. parse_args() walks
+# sys.argv itself for these so routine (and --watch restart) invocations skip
+# argparse's parser construction; anything unrecognized falls back to argparse
+# for the usual help and error messages.
+_CLI_FLAGS = {
+    "--dry-run": "dry_run",
+    "--undo": "undo",
+    "--watch": "watch",
+    "--no-ai": "no_ai",
+    "--dedup": "dedup",
+    "--no-rename": "no_rename",
+}
+
+def build_arg_parser():
     parser = argparse.ArgumentParser(
         description="⚡ Ultra Pro Max File Organizer — AI-Powered, Smart Duplicates, Undo, Watch Mode",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -809,10 +1317,35 @@ Examples:
     parser.add_argument("--undo",        action="store_true", help="Reverse the last organization run")
     parser.add_argument("--watch",       action="store_true", help="Watch folder and auto-organize new files")
     parser.add_argument("--no-ai",       action="store_true", help="Skip AI classification, use rules only")
+    parser.add_argument("--dedup",       action="store_true", help="Hash files to detect duplicates (slower)")
     parser.add_argument("--no-rename",   action="store_true", help="Skip auto-renaming files with date prefix")
     parser.add_argument("--granularity", type=str, default="normal", choices=["normal", "high"], help="AI sorting depth")
+    return parser
+
+def parse_args(argv=None):
+    """Parse the documented flag set with a plain loop; defer to argparse otherwise."""
+    if argv is None:
+        argv = sys.argv[1:]
+    args = argparse.Namespace(
+        path=None, dry_run=False, undo=False, watch=False,
+        no_ai=False, dedup=False, no_rename=False, granularity="normal")
+    it = iter(argv)
+    for arg in it:
+        if arg in _CLI_FLAGS:
+            setattr(args, _CLI_FLAGS[arg], True)
+        elif arg == "--path" or arg.startswith("--path="):
+            args.path = arg[7:] if len(arg) > 6 else next(it, '')
+        elif arg == "--granularity" or arg.startswith("--granularity="):
+            args.granularity = arg[14:] if len(arg) > 13 else next(it, '')
+        else:
+            # --help, abbreviations, typos: argparse gives the proper output.
+            return build_arg_parser().parse_args(argv)
+    if args.path == '' or args.granularity not in ("normal", "high"):
+        return build_arg_parser().parse_args(argv)
+    return args
 
-    args = parser.parse_args()
+def main():
+    args = parse_args()
 
     # Banner
     if console:
@@ -861,7 +1394,7 @@ Examples:
         return
 
     # ── Main organize ──
-    organize(target_dir, config, granularity=granularity, dry_run=args.dry_run, rename=not args.no_rename)
+    organize(target_dir, config, granularity=granularity, dry_run=args.dry_run, rename=not args.no_rename, dedup=args.dedup)
 
 
 if __name__ == "__main__":